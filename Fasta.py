@@ -1,3 +1,173 @@
+#!/usr/bin/env python3
+from typing import Dict, Generator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # only needed for sequence stats
+    np = None
+
+BASES = "ACGT"
+KMER_CHUNK = 1 << 22  # k-mers encoded at once, bound memory on long sequences
+BINCOUNT_MAX_K = 11  # above, 4**k counters get too big and np.unique is used
+
+# ASCII code -> 0/1 tables, built on first use
+_MASK_CHARS = {
+    "gc": "GCgc",
+    "acgt": "ACGTacgt",
+    "n": "Nn",
+    "masked": "abcdefghijklmnopqrstuvwxyz",
+}
+_MASK_TABLES = {}
+_KMER_TABLE = None
+
+
+def _mask_table(name: str) -> "np.ndarray":
+    """Return a 256 entries uint8 table, 1 for the chars of mask name, 0 otherwise."""
+    if name not in _MASK_TABLES:
+        table = np.zeros(256, dtype=np.uint8)
+        table[np.frombuffer(_MASK_CHARS[name].encode("ascii"), dtype=np.uint8)] = 1
+        _MASK_TABLES[name] = table
+    return _MASK_TABLES[name]
+
+
+def _kmer_table() -> "np.ndarray":
+    """Return a 256 entries uint8 table, 2-bit code of ACGT (case insensitive), 255 otherwise."""
+    global _KMER_TABLE
+    if _KMER_TABLE is None:
+        _KMER_TABLE = np.full(256, 255, dtype=np.uint8)
+        for code, base in enumerate(BASES):
+            _KMER_TABLE[[ord(base), ord(base.lower())]] = code
+    return _KMER_TABLE
+
+
+def _to_array(seq: str) -> "np.ndarray":
+    if np is None:
+        raise Exception("numpy is required to compute sequence stats")
+    return np.frombuffer(seq.encode("ascii"), dtype=np.uint8)
+
+
+def _mask(arr, name: str) -> "np.ndarray":
+    """Return a uint8 0/1 mask of arr for gc, acgt, n or masked (lowercase) bases."""
+    return _mask_table(name)[arr]
+
+
+def _count(arr, name: str) -> int:
+    return int(np.count_nonzero(_mask(arr, name)))
+
+
+def _ratio(num, den):
+    """Elementwise num / den, 0 where den is 0."""
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=den != 0)
+
+
+def _runs(mask) -> List[Tuple[int, int]]:
+    """Return (start, end) 0-based half-open intervals where mask is non zero."""
+    padded = np.zeros(len(mask) + 2, dtype=np.int8)
+    padded[1:-1] = mask
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def _kmer_chunks(arr, k: int):
+    """Yield 2-bit encoded k-mers of arr by chunks, skipping those with a non ACGT base."""
+    for start in range(0, len(arr) - k + 1, KMER_CHUNK):
+        codes = _kmer_table()[arr[start : start + KMER_CHUNK + k - 1]]
+        n_kmers = len(codes) - k + 1
+        invalid = np.cumsum(codes == 255, dtype=np.int32)
+        valid = invalid[k - 1 :].copy()
+        valid[1:] -= invalid[: n_kmers - 1]
+
+        kmers = np.zeros(n_kmers, dtype=np.uint64)
+        for i in range(k):  # k vector operations, not len(seq) * k
+            kmers <<= np.uint64(2)
+            kmers |= codes[i : i + n_kmers]
+        yield kmers[valid == 0]
+
+
+def _merge_counts(codes, counts):
+    """Sum counts of identical codes, return sorted unique codes and their counts."""
+    if len(codes) == 0:
+        return codes, counts
+    order = np.argsort(codes, kind="stable")
+    codes, counts = codes[order], counts[order]
+    first = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    return codes[first], np.add.reduceat(counts, first)
+
+
+def _kmer_counts(arr, k: int):
+    """Return sorted 2-bit codes of k-mers found in arr and their counts, as numpy arrays."""
+    if not 0 < k <= 32:
+        raise Exception(f"k should be between 1 and 32, got {k}")
+
+    if k <= BINCOUNT_MAX_K:
+        counts = np.zeros(4**k, dtype=np.int64)
+        for kmers in _kmer_chunks(arr, k):
+            counts += np.bincount(kmers.astype(np.intp), minlength=4**k)
+        codes = np.flatnonzero(counts).astype(np.uint64)
+        return codes, counts[codes]
+
+    codes, counts = np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    pending, pending_size = [], 0
+    for kmers in _kmer_chunks(arr, k):
+        pending.append(np.unique(kmers, return_counts=True))
+        pending_size += len(pending[-1][0])
+        if pending_size > len(codes):  # merge when pending chunks outgrow the total, amortized
+            codes, counts = _merge_counts(
+                np.concatenate([codes] + [c for c, _ in pending]),
+                np.concatenate([counts] + [n for _, n in pending]),
+            )
+            pending, pending_size = [], 0
+    if pending:
+        codes, counts = _merge_counts(
+            np.concatenate([codes] + [c for c, _ in pending]),
+            np.concatenate([counts] + [n for _, n in pending]),
+        )
+    return codes, counts
+
+
+def _decode_kmers(codes, k: int) -> "np.ndarray":
+    """Decode 2-bit codes to an array of k-mer strings."""
+    shifts = np.arange(2 * (k - 1), -1, -2, dtype=np.uint64)
+    digits = ((codes[:, None] >> shifts) & np.uint64(3)).astype(np.uint8)
+    letters = np.frombuffer(BASES.encode("ascii"), dtype=np.uint8)[digits]
+    return np.ascontiguousarray(letters).view(f"S{k}").ravel().astype(f"U{k}")
+
+
+def _seq_stats(arr) -> Tuple[int, float, int, int, float]:
+    return (
+        len(arr),
+        float(_ratio(_count(arr, "gc"), _count(arr, "acgt"))),
+        _count(arr, "n"),
+        len(_runs(_mask(arr, "n"))),
+        float(_ratio(_count(arr, "masked"), len(arr))),
+    )
+
+
+def _window_stats(arr, size: int, step=None):
+    step = size if step is None else step
+    if size <= 0 or step <= 0:
+        raise Exception("Window size and step should be positive")
+
+    starts = np.arange(0, len(arr), step)
+    last = np.minimum(starts + size, len(arr)) - 1
+    cumsum_dtype = np.uint32 if len(arr) < 2**32 else np.uint64
+    sums = {}
+    for name in ("gc", "acgt", "n", "masked"):  # one mask and its cumsum in memory at a time
+        mask = _mask(arr, name)
+        cumsum = np.cumsum(mask, dtype=cumsum_dtype)
+        sums[name] = (cumsum[last] - cumsum[starts] + mask[starts]).astype(np.int64)
+        del mask, cumsum
+    return zip(
+        starts.tolist(),
+        (last + 1).tolist(),
+        _ratio(sums["gc"], sums["acgt"]).tolist(),
+        sums["n"].tolist(),
+        _ratio(sums["masked"], last + 1 - starts).tolist(),
+    )
+
+
 class Seq:
     def __init__(self, id, seq, commentary):
         self.id = id
@@ -18,6 +188,37 @@ class Seq:
         for i in range(0, len(self.seq), n):
             yield self.seq[i : i + n] + "\n"
 
+    def to_array(self) -> "np.ndarray":
+        """Return the sequence as a numpy uint8 array of ASCII codes."""
+        return _to_array(self.seq)
+
+    def gc_content(self) -> float:
+        """G+C over A+C+G+T, case insensitive, N and IUPAC ignored"""
+        arr = self.to_array()
+        return float(_ratio(_count(arr, "gc"), _count(arr, "acgt")))
+
+    def soft_masked_fraction(self) -> float:
+        """Fraction of lowercase (soft-masked) bases"""
+        return float(_ratio(_count(self.to_array(), "masked"), len(self)))
+
+    def n_runs(self) -> List[Tuple[int, int]]:
+        """(start, end) 0-based half-open intervals of N/n gaps"""
+        return _runs(_mask(self.to_array(), "n"))
+
+    def kmer_counts(self, k: int) -> Dict[str, int]:
+        """Count k-mers (case insensitive), skipping those overlapping a non ACGT base"""
+        codes, counts = _kmer_counts(self.to_array(), k)
+        return dict(zip(_decode_kmers(codes, k).tolist(), counts.tolist()))
+
+    def stats(self) -> Tuple[int, float, int, int, float]:
+        """Return length, gc content, number of N, number of N-runs, soft-masked fraction"""
+        return _seq_stats(self.to_array())
+
+    def window_stats(self, size: int, step=None) -> Generator[Tuple[int, int, float, int, float], None, None]:
+        """Yield start, end, gc content, number of N, soft-masked fraction per window.
+        Windows start every step bases, so the last ones can be shorter than size."""
+        yield from _window_stats(self.to_array(), size, step)
+
 
 class Fasta:
     def __init__(self, fd):
@@ -52,3 +253,65 @@ class Fasta:
             seq = "".join(s.strip() for s in faiter.__next__())
 
             yield Seq(id, seq, commentary)
+
+    @staticmethod
+    def stats(fd, window=None, step=None) -> Generator[tuple, None, None]:
+        """Yield stats of each sequence, or of each window if window is given.
+        Sequences are parsed one at a time, so the whole file is never loaded."""
+        for seq in Fasta._parse_fasta(fd):
+            arr = seq.to_array()
+            if window is None:
+                yield (seq.id, *_seq_stats(arr))
+                continue
+            for row in _window_stats(arr, window, step):
+                yield (seq.id, *row)
+
+
+##################################################
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Utility tools for Fasta files.")
+    parser.add_argument(
+        "mode",
+        choices=["stats", "kmers"],
+        type=str,
+        help="GC, N and soft-masked stats per sequence (or per window) | k-mer counts per sequence",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        help="Path to your Fasta file. Use stdin by default.",
+        type=argparse.FileType("r"),
+        default=(None if sys.stdin.isatty() else sys.stdin),
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Path to your output file. Use stdout by default.",
+        type=argparse.FileType("w"),
+        default=sys.stdout,
+    )
+    parser.add_argument("-w", "--window", help="Window size for stats mode.", type=int, default=None)
+    parser.add_argument("-s", "--step", help="Window step. Window size by default.", type=int, default=None)
+    parser.add_argument("-k", help="k-mer size for kmers mode.", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.input is None:
+        print("\033[91mPlease specify your Fasta file or use stdin... See below for usage:\n\x1b[0m")
+        sys.exit(parser.print_help())
+
+    if args.mode == "stats":
+        if args.window is None:
+            args.output.write("#id\tlength\tgc\tn\tn_runs\tsoft_masked\n")
+        else:
+            args.output.write("#id\tstart\tend\tgc\tn\tsoft_masked\n")
+        for row in Fasta.stats(args.input, args.window, args.step):
+            args.output.write("\t".join(f"{v:.4f}" if isinstance(v, float) else str(v) for v in row) + "\n")
+
+    elif args.mode == "kmers":
+        for seq in Fasta._parse_fasta(args.input):
+            codes, counts = _kmer_counts(seq.to_array(), args.k)
+            for kmer, count in zip(_decode_kmers(codes, args.k).tolist(), counts.tolist()):
+                args.output.write(f"{seq.id}\t{kmer}\t{count}\n")
@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
 from typing import Generator, Tuple, List, Union
+from collections import OrderedDict
+from array import array
+import mmap
+import os
 import re
 
 FIELDS_IDX = {
@@ -257,6 +261,156 @@ class GTF(dict):
                     out.write(str(child) + "\n")
 
 
+class LazyGTF:
+    """Read-only view of a GTF file, where genes are parsed only when accessed.
+    A single scan records the byte offsets of each line by gene_id and
+    transcript_id, the file is memory-mapped and materialized genes are kept in
+    a LRU cache of cache_size genes."""
+
+    index_suffix = ".gtfidx"
+    regex = {
+        key: re.compile(rb"(?:^|;)\s*" + key + rb' "?([^";]*)"?;')
+        for key in (b"gene_id", b"transcript_id")
+    }
+
+    def __init__(self, path: str, cache_size=128, save_index=False) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.fd = open(path, "rb")
+        self.mm = None
+        try:
+            # mmap can't map an empty file
+            self.mm = mmap.mmap(self.fd.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else None
+            self.index = self.load_index()
+            if self.index is None:
+                self.index = self.build_index()
+                if save_index:
+                    self.save_index()
+        except:
+            self.close()
+            raise
+        self.transcript_to_gene = {
+            tx_id: g_id for g_id, transcripts in self.index.items() for tx_id in transcripts
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+        self.fd.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, gene_id: str):
+        return gene_id in self.index
+
+    def __iter__(self):
+        for gene_id in self.index:
+            yield self[gene_id]
+
+    def keys(self):
+        return self.index.keys()
+
+    def __getitem__(self, gene_id: str) -> GtfGene:
+        if gene_id in self.cache:
+            self.cache.move_to_end(gene_id)
+            return self.cache[gene_id]
+
+        gene = self.materialize(gene_id)
+        self.cache[gene_id] = gene
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return gene
+
+    def transcript(self, transcript_id: str) -> GtfTranscript:
+        return self[self.transcript_to_gene[transcript_id]].transcripts[transcript_id]
+
+    def materialize(self, gene_id: str) -> GtfGene:
+        gtf = GTF()
+        for tx_id, offsets in self.index[gene_id].items():
+            lines = (self.read_line(offset) for offset in offsets)
+            for record in GTF.parse_by_line(lines):
+                gtf.add_record(record)
+        return next(iter(gtf))
+
+    def read_line(self, offset: int) -> str:
+        end = self.mm.find(b"\n", offset)
+        return self.mm[offset : end if end != -1 else len(self.mm)].decode()
+
+    def build_index(self):
+        """Scan the file once, and store offsets of exon level lines by gene_id then transcript_id"""
+        index = {}
+        if self.mm is None:
+            return index
+        offset = 0
+        for line in iter(self.mm.readline, b""):
+            line_offset, offset = offset, offset + len(line)
+            if line.startswith(b"#"):
+                continue
+            fields = line.split(b"#", 1)[0].rstrip().split(b"\t")
+            if len(fields) != 9:
+                raise Exception(f"Unable to parse line:\n{line.decode()}")
+            if fields[2] in (b"gene", b"transcript"):
+                continue
+            # Last match wins, as in Attributes.from_str
+            g_ids = self.regex[b"gene_id"].findall(fields[8])
+            tx_ids = self.regex[b"transcript_id"].findall(fields[8])
+            if not g_ids or not tx_ids:
+                raise Exception(f"'transcript_id' or 'gene_id' not found in:\n{line.decode()}")
+            index.setdefault(g_ids[-1].decode(), {}).setdefault(tx_ids[-1].decode(), array("Q")).append(line_offset)
+        return index
+
+    @property
+    def index_path(self) -> str:
+        return self.path + self.index_suffix
+
+    def stamp(self) -> str:
+        stat = os.stat(self.path)
+        return f"#{stat.st_size}\t{stat.st_mtime_ns}"
+
+    def save_index(self) -> None:
+        """Write the index to a temporary file, then move it, so other jobs never read a partial index"""
+        import tempfile
+
+        directory, name = os.path.split(os.path.abspath(self.index_path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=f".{name}.", delete=False) as out:
+            try:
+                out.write(self.stamp() + "\n")
+                for g_id, transcripts in self.index.items():
+                    for tx_id, offsets in transcripts.items():
+                        out.write(f"{g_id}\t{tx_id}\t{','.join(map(str, offsets))}\n")
+            except:
+                out.close()
+                os.remove(out.name)
+                raise
+        os.replace(out.name, self.index_path)
+
+    def load_index(self):
+        """Load index saved next to the file, or return None if absent, outdated or corrupt"""
+        if not os.path.exists(self.index_path):
+            return None
+        index = {}
+        with open(self.index_path) as fd:
+            if fd.readline().rstrip("\n") != self.stamp():
+                return None
+            try:
+                for line in fd:
+                    g_id, tx_id, offsets = line.rstrip("\n").split("\t")
+                    index.setdefault(g_id, {})[tx_id] = array("Q", map(int, offsets.split(",")))
+            except ValueError:
+                return None
+        return index
+
+    write = GTF.write
+
+
 ##################################################
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,77 @@
+from ..Fasta import Seq, Fasta
+import io
+import pytest
+
+pytest.importorskip("numpy")
+
+
+class TestSeq:
+    seq = Seq("chr1", "ACGTNNacgtnNNGGCCaaAA", "test")
+
+    def test_to_array(self):
+        arr = Seq("s", "ACgt", "").to_array()
+        assert arr.dtype == "uint8"
+        assert arr.tolist() == [65, 67, 103, 116]
+
+    def test_gc_content(self):
+        assert self.seq.gc_content() == pytest.approx(8 / 16)
+        assert Seq("s", "NNNN", "").gc_content() == 0.0
+
+    def test_soft_masked_fraction(self):
+        assert self.seq.soft_masked_fraction() == pytest.approx(7 / 21)
+
+    def test_n_runs(self):
+        assert self.seq.n_runs() == [(4, 6), (10, 13)]
+        assert Seq("s", "NACN", "").n_runs() == [(0, 1), (3, 4)]
+        assert Seq("s", "ACGT", "").n_runs() == []
+
+    def test_kmer_counts(self):
+        assert Seq("s", "AAAAc", "").kmer_counts(3) == {"AAA": 2, "AAC": 1}
+        assert Seq("s", "ACNGT", "").kmer_counts(2) == {"AC": 1, "GT": 1}
+        assert Seq("s", "AC", "").kmer_counts(3) == {}
+        with pytest.raises(Exception, match="k should be between 1 and 32"):
+            Seq("s", "AC", "").kmer_counts(0)
+        with pytest.raises(Exception, match="k should be between 1 and 32"):
+            Seq("s", "AC", "").kmer_counts(-1)
+        assert Seq("s", "AC" * 20, "").kmer_counts(32) == {("AC" * 16): 5, ("CA" * 16): 4}
+
+    def test_kmer_counts_large_k_and_chunks(self, monkeypatch):
+        from .. import Fasta as fasta_module
+
+        seq = Seq("s", "ACGTNACGTACGTTacgt" * 3, "")
+        expected = seq.kmer_counts(12)  # np.unique path
+        monkeypatch.setattr(fasta_module, "BINCOUNT_MAX_K", 12)
+        assert seq.kmer_counts(12) == expected  # bincount path
+        monkeypatch.setattr(fasta_module, "KMER_CHUNK", 5)
+        assert seq.kmer_counts(12) == expected
+        upper = seq.seq.upper()
+        kmers = [upper[i : i + 3] for i in range(len(upper) - 2)]
+        assert seq.kmer_counts(3) == {kmer: kmers.count(kmer) for kmer in kmers if "N" not in kmer}
+
+    def test_stats(self):
+        assert self.seq.stats() == (21, pytest.approx(0.5), 5, 2, pytest.approx(7 / 21))
+
+    def test_window_stats(self):
+        windows = list(Seq("s", "GGGGNNNNaaaa", "").window_stats(4))
+        assert windows == [(0, 4, 1.0, 0, 0.0), (4, 8, 0.0, 4, 0.0), (8, 12, 0.0, 0, 1.0)]
+        assert [w[:2] for w in Seq("s", "ACGTA", "").window_stats(2, 1)] == [(0, 2), (1, 3), (2, 4), (3, 5), (4, 5)]
+        assert [w[:2] for w in Seq("s", "ACG", "").window_stats(10)] == [(0, 3)]
+        assert list(Seq("s", "", "").window_stats(4)) == []
+
+    def test_window_stats_partial_last(self):
+        seq = Seq("s", "ACGTACGTnN", "")
+        windows = list(seq.window_stats(4))
+        assert windows[-1] == (8, 10, 0.0, 2, 0.5)
+        assert sum(w[3] for w in windows) == seq.stats()[2]
+
+
+class TestFasta:
+    fasta = ">s1 first\nGGCC\nNNaa\n>s2\nATAT\n"
+
+    def test_stats(self):
+        stats = list(Fasta.stats(io.StringIO(self.fasta)))
+        assert stats == [("s1", 8, pytest.approx(4 / 6), 2, 1, 0.25), ("s2", 4, 0.0, 0, 0, 0.0)]
+
+    def test_stats_window(self):
+        stats = list(Fasta.stats(io.StringIO(self.fasta), window=4))
+        assert [row[:3] for row in stats] == [("s1", 0, 4), ("s1", 4, 8), ("s2", 0, 4)]
@@ -1,4 +1,7 @@
-from ..GTF import Attributes, GtfRecord, GtfParent, GtfTranscript, GtfGene, GTF
+from ..GTF import Attributes, GtfRecord, GtfParent, GtfTranscript, GtfGene, GTF, LazyGTF
+import io
+import os
+import shutil
 import pytest
 
 
@@ -183,3 +186,112 @@ class TestGTF:
 
         with open("test/short.CanFam3.gtf") as fd:  # Full gtf
             assert GTF.stats(fd) == (2, 3, 18)
+
+
+class TestLazyGTF:
+    path = "test/short.CanFam3.gtf"
+
+    def test_getitem(self):
+        with open(self.path) as fd:
+            gtf = GTF.parse(fd)
+        with LazyGTF(self.path) as lazy:
+            assert len(lazy) == len(gtf)
+            assert list(lazy.keys()) == list(gtf.keys())
+            for gene_id in gtf.keys():
+                assert gene_id in lazy
+                assert lazy[gene_id].format_to_gtf() == gtf[gene_id].format_to_gtf()
+
+    def test_transcript(self):
+        with LazyGTF(self.path) as lazy:
+            gene_id = next(iter(lazy.keys()))
+            for tx_id, transcript in lazy[gene_id].transcripts.items():
+                assert lazy.transcript(tx_id) is transcript
+
+    def test_cache(self):
+        with LazyGTF(self.path, cache_size=1) as lazy:
+            g1, g2 = lazy.keys()
+            gene = lazy[g1]
+            assert lazy[g1] is gene
+            lazy[g2]
+            assert list(lazy.cache) == [g2]
+            assert lazy[g1] is not gene
+
+    def test_write(self):
+        with open(self.path) as fd:
+            expected = io.StringIO()
+            GTF.parse(fd).write(expected)
+        with LazyGTF(self.path) as lazy:
+            out = io.StringIO()
+            lazy.write(out)
+        assert out.getvalue() == expected.getvalue()
+
+    def test_save_index(self, tmp_path):
+        path = str(tmp_path / "short.gtf")
+        shutil.copy(self.path, path)
+        with LazyGTF(path, save_index=True) as lazy:
+            index = lazy.index
+        with LazyGTF(path) as lazy:
+            assert lazy.load_index() == index
+
+        with open(path, "a") as fd:  # Outdated index is ignored
+            fd.write('1\tCuff\texon\t1\t10\t.\t+\t.\tgene_id "new"; transcript_id "new.1";\n')
+        with LazyGTF(path) as lazy:
+            assert lazy.load_index() is None
+            assert "new" in lazy
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "empty.gtf"
+        path.write_text("")
+        with LazyGTF(str(path)) as lazy:
+            assert len(lazy) == 0
+            assert list(lazy) == []
+
+    def test_malformed_line(self, tmp_path):
+        path = tmp_path / "bad.gtf"
+        path.write_text('1\tCuff\texon\t1\t10\t.\t+\tgene_id "g"; transcript_id "t";\n')
+        with pytest.raises(Exception, match="Unable to parse line"):
+            LazyGTF(str(path))
+
+    def check_closed_on_error(self, monkeypatch, path, match):
+        closed = []
+        close = LazyGTF.close
+        monkeypatch.setattr(LazyGTF, "close", lambda self: closed.append(close(self)))
+        with pytest.raises(Exception, match=match):
+            LazyGTF(str(path))
+        assert len(closed) == 1
+
+    def test_missing_id_closes_file(self, tmp_path, monkeypatch):
+        path = tmp_path / "bad.gtf"
+        path.write_text('1\tCuff\texon\t1\t10\t.\t+\t.\tgene_id "g";\n')
+        self.check_closed_on_error(monkeypatch, path, "'transcript_id' or 'gene_id' not found")
+
+    def test_corrupt_index_is_rebuilt(self, tmp_path):
+        path = str(tmp_path / "short.gtf")
+        shutil.copy(self.path, path)
+        with LazyGTF(path, save_index=True) as lazy:
+            keys = list(lazy.keys())
+        with open(path + LazyGTF.index_suffix, "a") as fd:
+            fd.write("corrupted line\n")
+        with LazyGTF(path) as lazy:
+            assert lazy.load_index() is None
+            assert list(lazy.keys()) == keys
+
+    def test_save_index_atomic(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "short.gtf")
+        shutil.copy(self.path, path)
+        with LazyGTF(path, save_index=True) as lazy:
+            saved = open(lazy.index_path).read()
+            monkeypatch.setattr(lazy, "stamp", lambda: 1 / 0)
+            with pytest.raises(ZeroDivisionError):
+                lazy.save_index()
+        assert open(path + LazyGTF.index_suffix).read() == saved
+        assert sorted(os.listdir(tmp_path)) == ["short.gtf", "short.gtf.gtfidx"]
+
+    def test_duplicated_id_last_wins(self, tmp_path):
+        path = tmp_path / "dup.gtf"
+        path.write_text('1\tCuff\texon\t1\t10\t.\t+\t.\tgene_id "a"; transcript_id "t"; gene_id "b";\n')
+        with open(str(path)) as fd:
+            gtf = GTF.parse(fd)
+        with LazyGTF(str(path)) as lazy:
+            assert list(lazy.keys()) == list(gtf.keys()) == ["b"]
+            assert lazy["b"].format_to_gtf() == gtf["b"].format_to_gtf()